@@ -76,7 +76,7 @@ class TestMemcacheSession(test_base.BaseTestCase):
 
         session = store.get_session(backend='memcache')
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
         session.add_flash('foo')
 
         rsp = webapp2.Response()
@@ -95,7 +95,7 @@ class TestMemcacheSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [(u'foo', None)])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         session.add_flash('bar')
         session.add_flash('baz', 'important')
@@ -116,7 +116,7 @@ class TestMemcacheSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [(u'bar', None), (u'baz', 'important')])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         rsp = webapp2.Response()
         store.save_sessions(rsp)
@@ -130,7 +130,7 @@ class TestMemcacheSession(test_base.BaseTestCase):
 
         session = store.get_session(backend='memcache')
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
 if __name__ == '__main__':
     test_base.main()
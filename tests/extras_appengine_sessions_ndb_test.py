@@ -100,7 +100,7 @@ class TestNdbSession(test_base.BaseTestCase):
 
         session = store.get_session(backend='datastore')
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
         session.add_flash('foo')
 
         rsp = webapp2.Response()
@@ -119,7 +119,7 @@ class TestNdbSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [(u'foo', None)])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         session.add_flash('bar')
         session.add_flash('baz', 'important')
@@ -140,7 +140,7 @@ class TestNdbSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [(u'bar', None), (u'baz', 'important')])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         rsp = webapp2.Response()
         store.save_sessions(rsp)
@@ -154,7 +154,7 @@ class TestNdbSession(test_base.BaseTestCase):
 
         session = store.get_session(backend='datastore')
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
     def test_misc(self):
 
@@ -41,6 +41,56 @@ class TestSecureCookie(test_base.BaseTestCase):
         rv2 = serializer2.deserialize('foo', result2)
         self.assertEqual(rv2, None)
 
+    def test_verified_signature_cache(self):
+        securecookie._verified_signatures.clear()
+        try:
+            serializer = securecookie.SecureCookieSerializer('cached-key')
+            result = serializer.serialize('foo', {'a': 'b'})
+            self.assertEqual(serializer.deserialize('foo', result),
+                             {'a': 'b'})
+
+            # A verified value doesn't need a new signature.
+            def get_signature(*parts):
+                raise AssertionError('Signature should be cached.')
+
+            serializer._get_signature = get_signature
+            self.assertEqual(serializer.deserialize('foo', result),
+                             {'a': 'b'})
+
+            # The cache is per secret key.
+            serializer2 = securecookie.SecureCookieSerializer('other-key')
+            self.assertEqual(serializer2.deserialize('foo', result), None)
+
+            # Bad signatures are never cached.
+            bad_signature = result.split('|')[2] + 'foo'
+            serializer3 = securecookie.SecureCookieSerializer('cached-key')
+            self.assertEqual(serializer3.deserialize('foo', result + 'foo'),
+                             None)
+            self.assertEqual(len(securecookie._verified_signatures), 1)
+            for key in securecookie._verified_signatures:
+                self.assertNotEqual(key[-1], bad_signature)
+        finally:
+            securecookie._verified_signatures.clear()
+
+    def test_verified_signature_cache_size(self):
+        size = securecookie._verified_signatures_size
+        securecookie._verified_signatures.clear()
+        securecookie._verified_signatures_size = 2
+        try:
+            serializer = securecookie.SecureCookieSerializer('cached-key')
+            results = [serializer.serialize('foo', i) for i in range(3)]
+            for i, result in enumerate(results):
+                self.assertEqual(serializer.deserialize('foo', result), i)
+
+            # The least recently used value was evicted.
+            cache = securecookie._verified_signatures
+            self.assertEqual(len(cache), 2)
+            values = [key[2] for key in cache]
+            self.assertEqual(values, [r.split('|')[0] for r in results[1:]])
+        finally:
+            securecookie._verified_signatures_size = size
+            securecookie._verified_signatures.clear()
+
 
 if __name__ == '__main__':
     test_base.main()
@@ -34,6 +34,13 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         store.save_sessions(rsp)
         self.assertTrue(rsp.headers['Set-Cookie'].startswith('foo='))
 
+    def test_serializer_cache(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+        store2 = sessions.SessionStore(req)
+        self.assertTrue(store.serializer is store2.serializer)
+
     def test_get_save_session(self):
         # Round 1 -------------------------------------------------------------
 
@@ -84,6 +91,59 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         self.assertEqual(session['g'], 'h')
 
         self.assertRaises(KeyError, session.pop, 'foo')
+        self.assertEqual(session.pop('foo', 'bar'), 'bar')
+
+    def test_pop(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+
+        session = store.get_session(factory=self.factory)
+        dict.update(session, {'a': 'b'})
+
+        # Missing keys don't modify the session.
+        self.assertEqual(session.pop('c', None), None)
+        self.assertFalse(session.modified)
+
+        self.assertEqual(session.pop('a'), 'b')
+        self.assertTrue(session.modified)
+        self.assertFalse('a' in session)
+
+    def test_save_modified_sessions(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+
+        session = store.get_session(factory=self.factory)
+        session2 = store.get_session(name='foo', factory=self.factory)
+
+        rsp = webapp2.Response()
+        store.save_sessions(rsp)
+        self.assertEqual(rsp.headers.getall('Set-Cookie'), [])
+
+        session['a'] = 'b'
+        store.save_sessions(rsp)
+        cookies = rsp.headers.getall('Set-Cookie')
+        self.assertEqual(len(cookies), 1)
+        self.assertTrue(cookies[0].startswith('session='))
+
+        # Nested values can be changed marking the session as modified.
+        session2.setdefault('c', [])
+        session2.modified = False
+        session2['c'].append('d')
+        session2.modified = True
+
+        rsp = webapp2.Response()
+        store.save_sessions(rsp)
+        cookies = rsp.headers.getall('Set-Cookie')
+        self.assertEqual(len(cookies), 2)
+        self.assertTrue(cookies[1].startswith('foo='))
+
+    def test_session_dict_without_store(self):
+        session = sessions.SessionDict(None)
+        session['a'] = 'b'
+        self.assertTrue(session.modified)
+        self.assertEqual(session['a'], 'b')
 
     def test_flashes(self):
 
@@ -95,7 +155,7 @@ class TestSecureCookieSession(test_base.BaseTestCase):
 
         session = store.get_session(factory=self.factory)
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
         session.add_flash('foo')
 
         rsp = webapp2.Response()
@@ -114,7 +174,7 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [[u'foo', None]])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         session.add_flash('bar')
         session.add_flash('baz', 'important')
@@ -135,7 +195,7 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         self.assertEqual(flashes, [[u'bar', None], [u'baz', 'important']])
 
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
         rsp = webapp2.Response()
         store.save_sessions(rsp)
@@ -149,7 +209,7 @@ class TestSecureCookieSession(test_base.BaseTestCase):
 
         session = store.get_session(factory=self.factory)
         flashes = session.get_flashes()
-        self.assertEqual(flashes, [])
+        self.assertEqual(flashes, ())
 
     def test_set_secure_cookie(self):
 
@@ -173,6 +233,56 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         res = store.get_secure_cookie('foo')
         self.assertEqual(res, {'bar': 'baz'})
 
+    def test_get_secure_cookie_not_set(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+        self.assertEqual(store.get_secure_cookie('foo'), None)
+
+        req = webapp2.Request.blank('/', headers=[('Cookie', 'bar=baz')])
+        req.app = app
+        store = sessions.SessionStore(req)
+        self.assertEqual(store.get_secure_cookie('foo'), None)
+
+        # Unicode names with a non-ASCII cookie header.
+        req = webapp2.Request.blank('/',
+                                    headers=[('Cookie', 'bar=caf\xc3\xa9')])
+        req.app = app
+        store = sessions.SessionStore(req)
+        self.assertEqual(store.get_secure_cookie(u'foo'), None)
+        session = store.get_session(u'foo', factory=self.factory)
+        self.assertEqual(dict(session), {})
+
+    def test_get_secure_cookie_unicode_name(self):
+        rsp = webapp2.Response()
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+        store.set_secure_cookie('foo', {'bar': 'baz'})
+        store.save_sessions(rsp)
+
+        cookies = rsp.headers.get('Set-Cookie') + '; bar=caf\xc3\xa9'
+        req = webapp2.Request.blank('/', headers=[('Cookie', cookies)])
+        req.app = app
+        store = sessions.SessionStore(req)
+        self.assertEqual(store.get_secure_cookie(u'foo'), {'bar': 'baz'})
+
+    def test_session_args(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+
+        store.set_secure_cookie('foo', {'bar': 'baz'}, max_age=10)
+        store.get_session()['a'] = 'b'
+        self.assertEqual(store.sessions['foo'].session_args['max_age'], 10)
+        self.assertEqual(store.config['cookie_args']['max_age'], None)
+
+        rsp = webapp2.Response()
+        store.save_sessions(rsp)
+        cookies = rsp.headers.getall('Set-Cookie')
+        self.assertTrue('Max-Age=10' in cookies[0])
+        self.assertFalse('Max-Age' in cookies[1])
+
     def test_set_session_store(self):
         app = webapp2.WSGIApplication(config={
             'webapp2_extras.sessions': {
@@ -214,6 +324,31 @@ class TestSecureCookieSession(test_base.BaseTestCase):
         f = sessions.CustomBackendSessionFactory('foo', store)
         self.assertRaises(NotImplementedError, f._get_by_sid, None)
 
+    def test_get_new_sid(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+
+        f = sessions.CustomBackendSessionFactory('foo', store)
+        sid = f._get_new_sid()
+        self.assertEqual(len(sid), 22)
+        self.assertTrue(set(sid) <= set(f._sid_alphabet))
+        self.assertNotEqual(sid, f._get_new_sid())
+
+    def test_is_valid_sid(self):
+        req = webapp2.Request.blank('/')
+        req.app = app
+        store = sessions.SessionStore(req)
+
+        f = sessions.CustomBackendSessionFactory('foo', store)
+        self.assertTrue(f._is_valid_sid(f._get_new_sid()))
+        self.assertTrue(f._is_valid_sid(u'a' * 22))
+        self.assertFalse(f._is_valid_sid(None))
+        self.assertFalse(f._is_valid_sid(''))
+        self.assertFalse(f._is_valid_sid('a' * 21))
+        self.assertFalse(f._is_valid_sid('a' * 21 + '-'))
+        self.assertFalse(f._is_valid_sid('a' * 22 + '\n'))
+
 
 if __name__ == '__main__':
     test_base.main()
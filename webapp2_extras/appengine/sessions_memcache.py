@@ -31,6 +31,8 @@ class MemcacheSessionFactory(sessions.CustomBackendSessionFactory):
     make sessions available in a :class:`webapp2.RequestHandler`.
     """
 
+    __slots__ = ()
+
     def _get_by_sid(self, sid):
         """Returns a session given a session id."""
         if self._is_valid_sid(sid):
@@ -48,4 +50,4 @@ class MemcacheSessionFactory(sessions.CustomBackendSessionFactory):
 
         memcache.set(self.sid, dict(self.session))
         self.session_store.save_secure_cookie(
-            response, self.name, {'_sid': self.sid}, **self.session_args)
+            response, self.name, {'_sid': self.sid}, **self._get_save_args())
@@ -94,6 +94,8 @@ class DatastoreSessionFactory(sessions.CustomBackendSessionFactory):
     make sessions available in a :class:`webapp2.RequestHandler`.
     """
 
+    __slots__ = ()
+
     #: The session model class.
     session_model = Session
 
@@ -114,4 +116,4 @@ class DatastoreSessionFactory(sessions.CustomBackendSessionFactory):
 
         self.session_model(id=self.sid, data=dict(self.session))._put()
         self.session_store.save_secure_cookie(
-            response, self.name, {'_sid': self.sid}, **self.session_args)
+            response, self.name, {'_sid': self.sid}, **self._get_save_args())
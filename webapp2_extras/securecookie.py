@@ -9,14 +9,23 @@
     :license: Apache Sotware License, see LICENSE for details.
 """
 import Cookie
+import collections
 import hashlib
 import hmac
 import logging
+import threading
 import time
 
 from webapp2_extras import json
 from webapp2_extras import security
 
+#: Maximum number of verified signatures kept in :data:`_verified_signatures`.
+_verified_signatures_size = 1000
+#: Least recently used cache of cookie values with a valid signature.
+#: Only good signatures are stored, so invalid cookies can't evict entries.
+_verified_signatures = collections.OrderedDict()
+_verified_signatures_lock = threading.Lock()
+
 
 class SecureCookieSerializer(object):
     """Serializes and deserializes secure cookie values.
@@ -32,6 +41,8 @@ class SecureCookieSerializer(object):
             signature.
         """
         self.secret_key = secret_key
+        # Keyed HMAC, copied for each signature to skip the key setup.
+        self._hmac = hmac.new(secret_key, digestmod=hashlib.sha1)
 
     def serialize(self, name, value):
         """Serializes a signed cookie value.
@@ -71,9 +82,7 @@ class SecureCookieSerializer(object):
         if len(parts) != 3:
             return None
 
-        signature = self._get_signature(name, parts[0], parts[1])
-
-        if not security.compare_hashes(parts[2], signature):
+        if not self._verify_signature(name, parts[0], parts[1], parts[2]):
             logging.warning('Invalid cookie signature %r', value)
             return None
 
@@ -97,8 +106,31 @@ class SecureCookieSerializer(object):
     def _get_timestamp(self):
         return int(time.time())
 
+    def _verify_signature(self, name, value, timestamp, signature):
+        """Checks a cookie signature, skipping the HMAC for values that
+        were already verified with the same secret key.
+        """
+        key = (self.secret_key, name, value, timestamp, signature)
+        with _verified_signatures_lock:
+            if key in _verified_signatures:
+                # Move it to the end: it is now the most recently used.
+                _verified_signatures[key] = _verified_signatures.pop(key)
+                return True
+
+        if not security.compare_hashes(signature,
+                                       self._get_signature(name, value,
+                                                           timestamp)):
+            return False
+
+        with _verified_signatures_lock:
+            _verified_signatures[key] = True
+            if len(_verified_signatures) > _verified_signatures_size:
+                _verified_signatures.popitem(last=False)
+
+        return True
+
     def _get_signature(self, *parts):
         """Generates an HMAC signature."""
-        signature = hmac.new(self.secret_key, digestmod=hashlib.sha1)
+        signature = self._hmac.copy()
         signature.update('|'.join(parts))
         return signature.hexdigest()
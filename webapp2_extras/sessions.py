@@ -8,12 +8,13 @@
     :copyright: 2011 by tipfy.org.
     :license: Apache Sotware License, see LICENSE for details.
 """
-import re
+import binascii
+import os
+import string
 
 import webapp2
 
 from webapp2_extras import securecookie
-from webapp2_extras import security
 
 #: Default configuration values for this module. Keys are:
 #:
@@ -76,20 +77,31 @@ default_config = {
 
 _default_value = object()
 
+#: Returned by :meth:`SessionDict.get_flashes` when there are no flashes.
+_no_flashes = ()
+
+#: Secure cookie serializers, keyed by secret key.
+_serializer_cache = {}
+
 
 class _UpdateDictMixin(object):
     """Makes dicts call `self.on_update` on modifications.
 
-    From werkzeug.datastructures.
+    From werkzeug.datastructures. Must be mixed with :class:`dict`.
     """
 
     on_update = None
 
     def calls_update(name):
+        # Bind the dict method once instead of looking it up through
+        # super() on every call.
+        method = getattr(dict, name)
+
         def oncall(self, *args, **kw):
-            rv = getattr(super(_UpdateDictMixin, self), name)(*args, **kw)
-            if self.on_update is not None:
-                self.on_update()
+            rv = method(self, *args, **kw)
+            on_update = self.on_update
+            if on_update is not None:
+                on_update()
             return rv
         oncall.__name__ = name
         return oncall
@@ -107,21 +119,40 @@ class _UpdateDictMixin(object):
 class SessionDict(_UpdateDictMixin, dict):
     """A dictionary for session data."""
 
-    __slots__ = ('container', 'new', 'modified')
+    __slots__ = ('container', 'new', '_modified')
 
     def __init__(self, container, data=None, new=False):
         self.container = container
         self.new = new
-        self.modified = False
+        self._modified = False
         dict.update(self, data or ())
 
+    def _get_modified(self):
+        return self._modified
+
+    def _set_modified(self, value):
+        if value and not self._modified:
+            # Let the store know that this session must be saved. Sessions
+            # without a store-backed container are only flagged.
+            session_store = getattr(self.container, 'session_store', None)
+            if session_store is not None:
+                session_store._set_modified(self.container)
+
+        self._modified = value
+
+    #: True if the session data changed and must be saved.
+    modified = property(_get_modified, _set_modified)
+
     def pop(self, key, *args):
-        # Only pop if key doesn't exist, do not alter the dictionary.
-        if key in self:
-            return super(SessionDict, self).pop(key, *args)
-        if args:
-            return args[0]
-        raise KeyError(key)
+        # Only mark the session as modified if the key existed.
+        value = dict.pop(self, key, _default_value)
+        if value is _default_value:
+            if args:
+                return args[0]
+            raise KeyError(key)
+
+        self.on_update()
+        return value
 
     def on_update(self):
         self.modified = True
@@ -132,9 +163,9 @@ class SessionDict(_UpdateDictMixin, dict):
         :param key:
             Name of the flash key stored in the session. Default is '_flash'.
         :returns:
-            The data stored in the flash, or an empty list.
+            The data stored in the flash, or an empty tuple.
         """
-        return self.pop(key, [])
+        return self.pop(key, _no_flashes)
 
     def add_flash(self, value, level=None, key='_flash'):
         """Adds a flash message. Flash messages are deleted when first read.
@@ -152,21 +183,41 @@ class SessionDict(_UpdateDictMixin, dict):
 class BaseSessionFactory(object):
     """Base class for all session factories."""
 
-    #: Name of the session.
-    name = None
-    #: A reference to :class:`SessionStore`.
-    session_store = None
-    #: Keyword arguments to save the session.
-    session_args = None
-    #: The session data, a :class:`SessionDict` instance.
-    session = None
+    __slots__ = ('name', 'session_store', '_session_args', 'session')
 
     def __init__(self, name, session_store):
+        #: Name of the session.
         self.name = name
+        #: A reference to :class:`SessionStore`.
         self.session_store = session_store
-        self.session_args = session_store.config['cookie_args'].copy()
+        # Keyword arguments to save the session, only copied from the
+        # configured ``cookie_args`` when accessed through `session_args`.
+        self._session_args = None
+        #: The session data, a :class:`SessionDict` instance.
         self.session = None
 
+    def _get_session_args(self):
+        if self._session_args is None:
+            self._session_args = \
+                self.session_store.config['cookie_args'].copy()
+
+        return self._session_args
+
+    def _set_session_args(self, value):
+        self._session_args = value
+
+    #: Keyword arguments to save the session.
+    session_args = property(_get_session_args, _set_session_args)
+
+    def _get_save_args(self):
+        """Returns the keyword arguments to save the session, without copying
+        the configured ``cookie_args`` if they were not changed.
+        """
+        if self._session_args is None:
+            return self.session_store.config['cookie_args']
+
+        return self._session_args
+
     def get_session(self, max_age=_default_value):
         raise NotImplementedError()
 
@@ -188,6 +239,8 @@ class SecureCookieSessionFactory(BaseSessionFactory):
        can't be visible to users. For this, use datastore or memcache sessions.
     """
 
+    __slots__ = ()
+
     def get_session(self, max_age=_default_value):
         if self.session is None:
             data = self.session_store.get_secure_cookie(self.name,
@@ -201,18 +254,26 @@ class SecureCookieSessionFactory(BaseSessionFactory):
         if self.session is None or not self.session.modified:
             return
 
+        # SessionDict is a dict, so it can be serialized without a copy.
         self.session_store.save_secure_cookie(
-            response, self.name, dict(self.session), **self.session_args)
+            response, self.name, self.session, **self._get_save_args())
 
 
 class CustomBackendSessionFactory(BaseSessionFactory):
     """Base class for sessions that use custom backends, e.g., memcache."""
 
-    #: The session unique id.
-    sid = None
+    __slots__ = ('sid',)
 
     #: Used to validate session ids.
-    _sid_re = re.compile(r'^\w{22}$')
+    _sid_length = 22
+    _sid_chars = frozenset(string.ascii_letters + string.digits + '_')
+    #: Used to generate session ids.
+    _sid_alphabet = string.ascii_letters + string.digits
+
+    def __init__(self, name, session_store):
+        super(CustomBackendSessionFactory, self).__init__(name, session_store)
+        #: The session unique id.
+        self.sid = None
 
     def get_session(self, max_age=_default_value):
         if self.session is None:
@@ -228,10 +289,21 @@ class CustomBackendSessionFactory(BaseSessionFactory):
 
     def _is_valid_sid(self, sid):
         """Check if a session id has the correct format."""
-        return sid and self._sid_re.match(sid) is not None
+        return sid and len(sid) == self._sid_length and \
+            self._sid_chars.issuperset(sid)
 
     def _get_new_sid(self):
-        return security.generate_random_string(entropy=128)
+        # A single read of 128 random bits, encoded in base 62: 22 chars are
+        # enough because 62 ** 22 > 2 ** 128.
+        num = int(binascii.hexlify(os.urandom(16)), 16)
+        alphabet = self._sid_alphabet
+        base = len(alphabet)
+        chars = []
+        for _ in xrange(self._sid_length):
+            num, rem = divmod(num, base)
+            chars.append(alphabet[rem])
+
+        return ''.join(chars)
 
 
 class SessionStore(object):
@@ -306,13 +378,26 @@ class SessionStore(object):
         self.config = request.app.config.load_config(self.config_key,
             default_values=default_config, user_values=config,
             required_keys=('secret_key',))
-        # Tracked sessions.
-        self.sessions = {}
+
+        # Defaults used on every session lookup.
+        self._cookie_name = self.config['cookie_name']
+        self._session_max_age = self.config['session_max_age']
+        # Tracked sessions, created when the first session is requested.
+        self.sessions = None
+        # Tracked sessions that were modified and must be saved.
+        self._modified_sessions = None
 
     @webapp2.cached_property
     def serializer(self):
-        # Serializer and deserializer for signed cookies.
-        return securecookie.SecureCookieSerializer(self.config['secret_key'])
+        # Serializer and deserializer for signed cookies. It doesn't keep
+        # request state, so the same instance is shared by all requests.
+        secret_key = self.config['secret_key']
+        serializer = _serializer_cache.get(secret_key)
+        if serializer is None:
+            serializer = _serializer_cache[secret_key] = \
+                securecookie.SecureCookieSerializer(secret_key)
+
+        return serializer
 
     def get_backend(self, name):
         """Returns a configured session backend, importing it if needed.
@@ -332,10 +417,15 @@ class SessionStore(object):
     # Backend based sessions --------------------------------------------------
 
     def _get_session_container(self, name, factory):
-        if name not in self.sessions:
-            self.sessions[name] = factory(name, self)
+        sessions = self.sessions
+        if sessions is None:
+            sessions = self.sessions = {}
 
-        return self.sessions[name]
+        container = sessions.get(name)
+        if container is None:
+            container = sessions[name] = factory(name, self)
+
+        return container
 
     def get_session(self, name=None, max_age=_default_value, factory=None,
                     backend='securecookie'):
@@ -363,13 +453,17 @@ class SessionStore(object):
         :returns:
             A dictionary-like session object.
         """
-        factory = factory or self.get_backend(backend)
-        name = name or self.config['cookie_name']
+        name = name or self._cookie_name
 
         if max_age is _default_value:
-            max_age = self.config['session_max_age']
+            max_age = self._session_max_age
+
+        # Only resolve the backend if the session is not tracked yet.
+        container = self.sessions.get(name) if self.sessions else None
+        if container is None:
+            factory = factory or self.get_backend(backend)
+            container = self._get_session_container(name, factory)
 
-        container = self._get_session_container(name, factory)
         return container.get_session(max_age=max_age)
 
     # Signed cookies ----------------------------------------------------------
@@ -386,7 +480,14 @@ class SessionStore(object):
             A secure cookie value or None if it is not set.
         """
         if max_age is _default_value:
-            max_age = self.config['session_max_age']
+            max_age = self._session_max_age
+
+        # Avoid parsing all cookies when this one is clearly not set.
+        # The header is a byte string, so compare it with an encoded name.
+        cookies = self.request.environ.get('HTTP_COOKIE')
+        raw_name = name.encode('utf-8') if isinstance(name, unicode) else name
+        if not cookies or raw_name not in cookies:
+            return None
 
         value = self.request.cookies.get(name)
         if value:
@@ -411,17 +512,67 @@ class SessionStore(object):
     # Saving to a response object ---------------------------------------------
 
     def save_sessions(self, response):
-        """Saves all sessions in a response object.
+        """Saves all modified sessions in a response object.
+
+        Only session factories whose :class:`SessionDict` was modified are
+        saved: setting a value or ``modified = True`` marks them. Factories
+        that don't keep their data in a :class:`SessionDict` must call
+        :meth:`_set_modified` themselves to be saved.
 
         :param response:
             A :class:`webapp.Response` object.
         """
-        for session in self.sessions.values():
-            session.save_session(response)
+        if self._modified_sessions:
+            for session in self._modified_sessions:
+                session.save_session(response)
+
+    def _set_modified(self, container):
+        """Marks a session container to be saved by :meth:`save_sessions`.
+
+        :param container:
+            A :class:`BaseSessionFactory` instance.
+        """
+        if self._modified_sessions is None:
+            self._modified_sessions = [container]
+        elif container not in self._modified_sessions:
+            self._modified_sessions.append(container)
 
-    def save_secure_cookie(self, response, name, value, **kwargs):
+    def save_secure_cookie(self, response, name, value, max_age=None,
+                           path='/', domain=None, secure=None,
+                           httponly=False, **kwargs):
+        """Serializes and sets a secure cookie in a response object.
+
+        :param response:
+            A :class:`webapp.Response` object.
+        :param name:
+            Cookie name.
+        :param value:
+            Cookie value. Must be a dictionary.
+        :param max_age:
+            Cookie max age in seconds. If None, the cookie lasts until the
+            client is closed.
+        :param path:
+            Path in which the cookie is valid. Default is `/`.
+        :param domain:
+            Domain of the cookie. If None, the cookie only works for the
+            current subdomain.
+        :param secure:
+            Make the cookie only available via HTTPS.
+        :param httponly:
+            Disallow JavaScript to access the cookie.
+        :param kwargs:
+            Other options to save the cookie, passed to
+            :meth:`webapp2.Response.set_cookie`.
+        """
         value = self.serializer.serialize(name, value)
-        response.set_cookie(name, value, **kwargs)
+        if kwargs:
+            response.set_cookie(name, value, max_age=max_age, path=path,
+                                domain=domain, secure=secure,
+                                httponly=httponly, **kwargs)
+        else:
+            # The usual case: the default cookie arguments only.
+            response.set_cookie(name, value, max_age, path, domain, secure,
+                                httponly)
 
 
 # Factories -------------------------------------------------------------------